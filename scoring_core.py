@@ -0,0 +1,442 @@
+import os, csv, heapq, pickle, multiprocessing
+from typing import Dict, Any, List, TextIO, Callable, Tuple
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback; json.loads also accepts bytes
+    import json as orjson
+
+PAPERS_DIR   = "json_data"
+POLICY_PATH  = "policy/checklist.json"
+OUT_DIR      = "results"
+DEBUG        = os.environ.get("SCORE_DEBUG") == "1"
+
+# Per-criterion scoring rule: (weight, evidence dict) -> integer score.
+ScoreFn = Callable[[int, Dict[str, Any]], int]
+
+DEFAULT_RUBRIC = {
+    "criteria": [
+        {"id": "real_time_transparency",        "name": "Real-Time Transparency",                                   "weight": 15},
+        {"id": "explainability",                "name": "Explainability",                                            "weight": 15},
+        {"id": "accountability",                "name": "Accountability",                                            "weight": 15},
+        {"id": "human_oversight",               "name": "Human Oversight",                                           "weight": 10},
+        {"id": "privacy",                       "name": "Privacy",                                                   "weight": 15},
+        {"id": "data_protection",               "name": "Data Protection",                                           "weight": 15},
+        {"id": "continuous_ethics_monitoring",  "name": "Continuous Ethical Monitoring (Lifecycle Governance)",      "weight": 15}
+    ],
+    "allow_partial_scoring": True,
+    "partial_ratio": 0.5
+}
+
+def clamp(n, lo, hi):
+    return max(lo, min(hi, n))
+
+def _normalize_quotes(x) -> List[str]:
+    # Fast path: an all-str list (the usual shape) is returned as-is.
+    if type(x) is list:
+        _str = str
+        for i in x:
+            if type(i) is not _str:
+                break
+        else:
+            return x
+    if isinstance(x, list):
+        return [str(i) for i in x if isinstance(i, (str, int, float))]
+    if isinstance(x, (str, int, float)):
+        return [str(x)]
+    return []
+
+def load_policy(policy_path: str = POLICY_PATH) -> Dict[str, Any]:
+    if os.path.exists(policy_path):
+        try:
+            with open(policy_path, "rb") as f:
+                policy = orjson.loads(f.read())
+        except Exception as e:
+            print(f"[WARN] Failed to load policy '{policy_path}': {e}. Using DEFAULT_RUBRIC.")
+            return DEFAULT_RUBRIC
+        crit = policy.get("criteria", [])
+        seen = set()
+        valid = True
+        for c in crit:
+            cid = c.get("id")
+            w = c.get("weight", 0)
+            if not cid or cid in seen:
+                print(f"[WARN] Invalid or duplicate criterion id: {cid}")
+                valid = False
+            seen.add(cid)
+            try:
+                w = int(w)
+            except Exception:
+                print(f"[WARN] Non-integer weight for {cid}: {w}")
+                valid = False
+            if w < 0:
+                print(f"[WARN] Negative weight for {cid}: {w}")
+                valid = False
+        if not valid or not crit:
+            print("[WARN] Policy invalid. Falling back to DEFAULT_RUBRIC.")
+            return DEFAULT_RUBRIC
+        return policy
+    return DEFAULT_RUBRIC
+
+# Reuses the last validated policy while checklist.json is unchanged (same
+# path, mtime and size); any cache problem falls back to load_policy().
+def load_policy_cached(policy_path: str, cache_path: str) -> Dict[str, Any]:
+    try:
+        st = os.stat(policy_path)
+    except OSError:
+        return load_policy(policy_path)
+    key = (os.path.abspath(policy_path), st.st_mtime_ns, st.st_size)
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, cached_policy = pickle.load(f)
+        if cached_key == key:
+            return cached_policy
+    except Exception:
+        pass
+    policy = load_policy(policy_path)
+    # Only cache a policy that passed validation, so fallback warnings repeat.
+    if policy is not DEFAULT_RUBRIC:
+        try:
+            with open(cache_path, "wb") as f:
+                pickle.dump((key, policy), f, protocol=5)
+        except Exception as e:
+            print(f"[WARN] Failed to write policy cache '{cache_path}': {e}")
+    return policy
+
+# Policy fields never change between papers, so read them once into
+# (id, name, weight) tuples.
+def criteria_table(policy: Dict[str, Any]) -> Tuple[Tuple[str, str, int], ...]:
+    return tuple((c["id"], c["name"], int(c["weight"])) for c in policy["criteria"])
+
+# Ask the kernel to start reading every paper up front so the disk reads are
+# queued together instead of one blocking read per worker. Linux/POSIX only;
+# a no-op elsewhere.
+def prefetch_files(paths: List[str]) -> None:
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# Reads a whole file as raw bytes for orjson, skipping the text-mode wrapper:
+# one fstat to size a bytearray, then readv straight into it. Falls back to a
+# plain binary read where os.readv is unavailable (e.g. Windows).
+def read_file_bytes(path: str) -> bytearray:
+    if not hasattr(os, "readv"):
+        with open(path, "rb") as f:
+            return bytearray(f.read())
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        buf = bytearray(size)
+        n = 0
+        with memoryview(buf) as mv:
+            while n < size:
+                got = os.readv(fd, [mv[n:]])
+                if not got:
+                    break
+                n += got
+        if n < size:
+            del buf[n:]
+        return buf
+    finally:
+        os.close(fd)
+
+# Writes one criterion section of a report, preceded by its blank separator
+# line. quotes/notes are the values already extracted while scoring.
+def append_block(out: TextIO, name: str, score: int, weight: int, reason: str,
+                 quotes: List[str], notes: str) -> None:
+    w = out.write
+    w(f"\n## {name}\n- Score: {score} / {weight}  ({reason})\n")
+    if quotes:
+        w("- Evidence pointers:\n")
+        for q in quotes[:8]:
+            w(f"  - {q}\n")
+    if notes:
+        w(f"- Notes: {notes}\n")
+
+# Per-run state, installed in each pool worker by _init_worker.
+_SCORE_FN: ScoreFn = None
+_CRITERIA: Tuple[Tuple[str, str, int], ...] = ()
+_REPORTS_DIR = ""
+
+def _init_worker(score_fn: ScoreFn, criteria, reports_dir: str) -> None:
+    global _SCORE_FN, _CRITERIA, _REPORTS_DIR
+    _SCORE_FN = score_fn
+    _CRITERIA = criteria
+    _REPORTS_DIR = reports_dir
+
+# Logs a report write failure and closes the half-written file; always
+# returns None so the caller stops writing that report.
+def _drop_report(rf, rpath: str, err) -> None:
+    if err is not None:
+        print(f"[WARN] Failed to write report '{rpath}': {err}")
+    if rf is not None:
+        try:
+            rf.close()
+        except Exception:
+            pass
+    return None
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Scores a single paper and writes its report to a temp file in the reports
+# dir; returns (row, tmp_report_path or None, bad_flag). The parent renames
+# the temp file into place in input order.
+def process_paper(path: str):
+    # Hot globals bound as locals for the criterion loop.
+    _criteria = _CRITERIA
+    _clamp = clamp
+    _norm = _normalize_quotes
+    _compute = _SCORE_FN
+    _append = append_block
+    try:
+        paper = orjson.loads(read_file_bytes(path))
+    except Exception as e:
+        print(f"[WARN] Skipping '{path}': cannot parse JSON ({e})")
+        return None, None, True
+
+    pid = paper.get("paper_id") or os.path.splitext(os.path.basename(path))[0]
+    meta = paper.get("metadata", {}) or {}
+    evall = paper.get("evidence", {}) if isinstance(paper.get("evidence"), dict) else {}
+    over = (paper.get("scoring", {}) or {}).get("score_override", {}) or {}
+    total_override = (paper.get("scoring", {}) or {}).get("total_score_manual_override", None)
+
+    detail_scores: List[int] = []
+    total = 0
+    # Sections are written to the report file as they are produced; the 64 KiB
+    # buffer holds a whole report, so it normally reaches disk in one write.
+    # A failed write is logged once and the rest of that report is skipped
+    # (rf becomes None); the paper's scores are still returned. The temp name
+    # comes from the (unique) input file name, so papers sharing a paper_id
+    # never write the same file concurrently.
+    rpath = os.path.join(_REPORTS_DIR, f"{pid}.md")
+    tmp_path = os.path.join(_REPORTS_DIR, f".{os.path.basename(path)}.tmp")
+    rf = None
+    report_ok = True
+    try:
+        rf = open(tmp_path, "w", encoding="utf-8", buffering=1 << 16)
+        rf.write(f"# {pid}\nTitle: {meta.get('title', '')}\nLink:  {meta.get('link', '')}\n")
+    except Exception as e:
+        rf = _drop_report(rf, rpath, e)
+        report_ok = False
+
+    try:
+        for cid, name, weight in _criteria:
+            # evall is always a dict here; normalise ev once so nothing below
+            # has to re-check its type.
+            ev = evall.get(cid)
+            if not isinstance(ev, dict):
+                ev = {}
+            quotes_raw = ev.get("quotes_or_pointers")
+            quotes = _norm(quotes_raw)
+            notes = ev.get("assessor_notes") or ""
+            override = over.get(cid, None)
+
+            if override is not None:
+                try:
+                    score = _clamp(int(override), 0, weight)
+                except Exception:
+                    score = 0
+                reason = f"Manual override = {score}"
+            else:
+                score = _compute(weight, ev)
+                reason = "Computed score based on extended evidence"
+
+            detail_scores.append(score)
+            total += score
+
+            if DEBUG:
+                print(f"[DEBUG] Paper '{pid}', Criterion '{cid}': present={ev.get('present')}, present_confidence={ev.get('present_confidence')}, quotes_count={len(quotes_raw or [])}, avg_quote_quality={ev.get('quote_quality')}, notes_quality={ev.get('notes_quality')}, score={score}")
+
+            if rf is not None:
+                try:
+                    _append(rf, name, score, weight, reason, quotes, notes)
+                except Exception as e:
+                    rf = _drop_report(rf, rpath, e)
+                    report_ok = False
+
+        if rf is not None:
+            try:
+                rf.close()
+            except Exception as e:
+                print(f"[WARN] Failed to write report '{rpath}': {e}")
+                report_ok = False
+            rf = None
+    finally:
+        # Only reached with rf still open if scoring itself raised.
+        if rf is not None:
+            _drop_report(rf, rpath, None)
+            report_ok = False
+        if not report_ok:
+            _remove_quietly(tmp_path)
+
+    if total_override is not None:
+        try:
+            total = int(total_override)
+        except Exception:
+            pass
+
+    # Row is already in CSV column order: paper_id, *criterion ids, total_score.
+    row = (pid, *detail_scores, total)
+    return row, (tmp_path if report_ok else None), False
+
+# Scores every paper in papers_dir with score_fn and writes per-paper reports,
+# scores.csv and summary.md under out_dir. Returns a process exit code.
+def run(papers_dir: str, score_fn: ScoreFn, policy_path: str = POLICY_PATH,
+        out_dir: str = OUT_DIR) -> int:
+    reports_dir = os.path.join(out_dir, "reports")
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(reports_dir, exist_ok=True)
+
+    policy = load_policy_cached(policy_path, os.path.join(out_dir, ".policy.cache"))
+    criteria = criteria_table(policy)
+
+    # os.scandir filters by name without a stat per entry; only .json names
+    # are stat()ed (on POSIX each DirEntry.stat() is one stat call, on
+    # Windows it comes from the directory read). Empty files can never parse,
+    # so they are counted as malformed without being opened.
+    paper_files = []
+    empty_files = 0
+    try:
+        it = os.scandir(papers_dir)
+    except OSError:
+        it = None
+    if it is not None:
+        with it:
+            for e in it:
+                if e.name.startswith(".") or not e.name.endswith(".json"):
+                    continue
+                try:
+                    if not e.is_file():
+                        continue
+                    size = e.stat().st_size
+                except OSError:
+                    # e.g. removed between the directory read and the stat
+                    continue
+                if size > 0:
+                    paper_files.append(e.path)
+                else:
+                    print(f"[WARN] Skipping '{e.path}': empty file")
+                    empty_files += 1
+    paper_files.sort()
+    if not paper_files and not empty_files:
+        print(f"No JSON files found in {papers_dir}.")
+        return 1
+
+    prefetch_files(paper_files)
+
+    n_scored = 0
+    bad_files = empty_files
+    # Only the running Top-5 is kept in memory. Entries are
+    # (total, -order, paper_id) so equal totals rank the earlier paper first.
+    top5_heap = []
+
+    # CSV rows are streamed out as each paper comes back from the pool, into a
+    # temp file that only replaces scores.csv once every paper has been
+    # handled; an aborted run leaves the previous scores.csv untouched.
+    csv_path = os.path.join(out_dir, "scores.csv")
+    csv_tmp = csv_path + ".tmp"
+    fieldnames = ["paper_id", *(cid for cid, _, _ in criteria), "total_score"]
+    cf = None
+    try:
+        cf = open(csv_tmp, "w", newline="", encoding="utf-8", buffering=1 << 16)
+        csv_w = csv.writer(cf)
+        csv_w.writerow(fieldnames)
+    except Exception as e:
+        print(f"[WARN] Failed to write CSV '{csv_path}': {e}")
+        if cf is not None:
+            try:
+                cf.close()
+            except Exception:
+                pass
+            _remove_quietly(csv_tmp)
+        cf = csv_w = None
+
+    # Papers are independent, so parse, score and write reports across cores.
+    # imap keeps input order so the CSV and Top-5 tie-breaks stay deterministic,
+    # and renaming each finished report into place here means that for a
+    # repeated paper_id the later file in sorted order wins.
+    seen_reports = set()
+    completed = False
+    try:
+        with multiprocessing.Pool(os.cpu_count(), initializer=_init_worker,
+                                  initargs=(score_fn, criteria, reports_dir)) as pool:
+            results = pool.imap(process_paper, paper_files, chunksize=4)
+            for path, (row, tmp_path, bad) in zip(paper_files, results):
+                if bad:
+                    bad_files += 1
+                    continue
+                pid = row[0]
+                # Keyed on the report path: paper_id may be any JSON value (even
+                # an unhashable list), but it is the file name that can collide.
+                rpath = os.path.join(reports_dir, f"{pid}.md")
+                if rpath in seen_reports:
+                    print(f"[WARN] Duplicate paper_id '{pid}' in '{path}'; its report replaces the earlier one.")
+                seen_reports.add(rpath)
+                if tmp_path is not None:
+                    try:
+                        os.replace(tmp_path, rpath)
+                    except OSError as e:
+                        print(f"[WARN] Failed to write report '{rpath}': {e}")
+                        _remove_quietly(tmp_path)
+                if csv_w is not None:
+                    try:
+                        csv_w.writerow(row)
+                    except Exception as e:
+                        print(f"[WARN] Failed to write CSV '{csv_path}': {e}")
+                        csv_w = None
+                entry = (row[-1], -n_scored, pid)
+                if len(top5_heap) < 5:
+                    heapq.heappush(top5_heap, entry)
+                else:
+                    heapq.heappushpop(top5_heap, entry)
+                n_scored += 1
+        completed = True
+    finally:
+        if cf is not None:
+            try:
+                cf.close()
+            except Exception as e:
+                print(f"[WARN] Failed to write CSV '{csv_path}': {e}")
+                csv_w = None
+            if completed and csv_w is not None:
+                try:
+                    os.replace(csv_tmp, csv_path)
+                except OSError as e:
+                    print(f"[WARN] Failed to write CSV '{csv_path}': {e}")
+                    _remove_quietly(csv_tmp)
+            else:
+                _remove_quietly(csv_tmp)
+
+    summary_path = os.path.join(out_dir, "summary.md")
+    top5 = sorted(top5_heap, reverse=True)
+    try:
+        with open(summary_path, "w", encoding="utf-8") as sf:
+            sf.write("# Summary\n\n")
+            sf.write(f"Total papers scored: {n_scored}\n\n")
+            if bad_files:
+                sf.write(f"Skipped malformed JSON files: {bad_files}\n\n")
+            sf.write("## Top-5 by total score\n")
+            for i, item in enumerate(top5, 1):
+                sf.write(f"{i}. {item[2]} — {item[0]}\n")
+            sf.write("\n## Notes\n- Scoring leverages presence confidence, evidence and notes quality, and evidence types.\n- Manual overrides are respected.\n")
+    except Exception as e:
+        print(f"[WARN] Failed to write summary '{summary_path}': {e}")
+
+    print(f"Done. Wrote {csv_path}, {summary_path} and {n_scored} reports to {reports_dir}")
+    if bad_files:
+        print(f"[INFO] Skipped {bad_files} malformed JSON file(s).")
+    return 0